@@ -1,6 +1,12 @@
+import hashlib
+import os
+import tempfile
+from functools import cache
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
 
 # --------------------------------------------------
@@ -22,77 +28,206 @@ CANADA_PROVINCES = [
     "Yukon", "Northwest Territories", "Nunavut",
 ]
 
+XL_FILE = "Canadian Aircraft Registry.xlsx"
+SIDECARS = {"carsownr": "owners.parquet", "carscurr": "carscurr.parquet"}
+# Stored as the Parquet index so load_data can join on it directly.
+SIDECAR_INDEX = {"carsownr": "Registration Mark"}
+
+# Columns referenced by the dashboard; weight and country-of-manufacture
+# columns are matched by name since their exact headers vary.
+LOAD_COLS = [
+    "Mark", "Registration", "Number of Engines", "Aircraft Age",
+    "Year of Manufacture/Assembly", "Issue Date", "Modified Date",
+    "Province (English)", "Aircraft Category", "Type of Owner", "Engine Category",
+    "Common Name", "Model Name", "Manufacturer's Name", "Owner Name",
+]
+
+@cache
+def plotly_go():
+    """Import plotly lazily; it's only needed once a chart is actually drawn."""
+    import plotly.graph_objects as go
+    return go
+
+def to_int16(series):
+    """Nullable Int16 copy of a column; unparseable or out-of-range values become <NA>."""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    values = np.round(series.to_numpy(dtype="float64", na_value=np.nan))
+    info = np.iinfo(np.int16)
+    values[(values < info.min) | (values > info.max)] = np.nan
+    return pd.array(values, dtype="Int16")
+
+def in_range(series, lo, hi):
+    """Boolean array for lo <= series <= hi; missing values never match."""
+    a = series.to_numpy(dtype="float64", na_value=np.nan)
+    return (a >= lo) & (a <= hi)
+
+def is_load_col(name):
+    lname = name.lower()
+    return name in LOAD_COLS or "weight" in lname or ("country" in lname and "manufact" in lname)
+
+def source_sig():
+    """Identifies the workbook version; any change in mtime or size counts."""
+    stat = os.stat(XL_FILE)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+def sidecar_sig(path):
+    """Workbook signature a sidecar was built from, or None if missing/unreadable."""
+    try:
+        meta = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return None
+    return meta.get(b"source_sig", b"").decode() or None
+
+def refresh_sidecars():
+    """(Re)build the Parquet copy of every sheet not built from the current workbook."""
+    sig = source_sig()
+    stale = [sheet for sheet, path in SIDECARS.items() if sidecar_sig(path) != sig]
+    if not stale:
+        return
+    # A single ExcelFile opens and decompresses the workbook once for all sheets.
+    with pd.ExcelFile(XL_FILE, engine="openpyxl") as xl:
+        for sheet in stale:
+            sheet_df = xl.parse(sheet)
+            # Mixed-type object columns (e.g. numbers alongside "null") can't be written by Arrow.
+            obj_cols = sheet_df.select_dtypes("object").columns
+            sheet_df = sheet_df.astype({c: "string" for c in obj_cols})
+            if sheet in SIDECAR_INDEX:
+                sheet_df = sheet_df.set_index(SIDECAR_INDEX[sheet])
+            table = pa.Table.from_pandas(sheet_df)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source_sig": sig.encode()})
+            # Write to a uniquely named file beside the target and swap it in, so
+            # neither an interrupted conversion nor a second process converting at
+            # the same time can leave a truncated sidecar behind.
+            path = SIDECARS[sheet]
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".parquet.tmp")
+            os.close(fd)
+            try:
+                pq.write_table(table, tmp, compression="zstd")
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+
+def read_sheet(sheet):
+    path = SIDECARS[sheet]
+    cols = [c for c in pq.read_schema(path).names if is_load_col(c)]
+    return pd.read_parquet(path, engine="pyarrow", columns=cols)  # index is restored too
+
 # --------------------------------------------------
 # Data Loading
 # --------------------------------------------------
-@st.cache_data
-def load_data():
-    xl_file = "Canadian Aircraft Registry.xlsx"
-    owners = pd.read_excel(xl_file, sheet_name="carsownr")
-    curr = pd.read_excel(xl_file, sheet_name="carscurr")
-
-    df = curr.merge(owners, left_on="Mark", right_on="Registration Mark", how="left")
-    df["Number of Engines"] = pd.to_numeric(df["Number of Engines"], errors="coerce")
-    df["Aircraft Age"] = pd.to_numeric(df["Aircraft Age"], errors="coerce")
-    df["Year of Manufacture/Assembly"] = pd.to_numeric(df["Year of Manufacture/Assembly"], errors="coerce")
+@st.cache_data(persist="disk", show_spinner="Loading registry…")
+def load_data(sig):
+    # `sig` is the workbook's mtime and size so edits to the spreadsheet invalidate the cache.
+    refresh_sidecars()
+    owners = read_sheet("carsownr")
+    curr = read_sheet("carscurr")
+
+    # Registration Mark repeats in carsownr, so the join repeats curr's labels.
+    df = curr.join(owners, on="Mark", how="left").reset_index(drop=True)
+    df = df.replace("null", pd.NA)
+    # Small nullable ints: a quarter of float64's footprint and cheaper to group on.
+    for c in ["Number of Engines", "Year of Manufacture/Assembly"]:
+        df[c] = to_int16(df[c])
+    if "Aircraft Age" in df.columns:
+        df["Aircraft Age"] = to_int16(df["Aircraft Age"])
+    else:
+        year = df["Year of Manufacture/Assembly"].to_numpy(dtype="float64", na_value=np.nan)
+        df["Aircraft Age"] = pd.array(pd.Timestamp.today().year - year, dtype="Int16")
 
     date_col = "Issue Date" if "Issue Date" in df.columns else "Modified Date"
-    df["Reg Year"] = pd.to_datetime(df[date_col], errors="coerce").dt.year
+    df["Reg Year"] = to_int16(pd.to_datetime(df[date_col], errors="coerce").dt.year)
 
     wcol = next((c for c in df.columns if "weight" in c.lower()), None)
     if wcol:
         df[wcol] = pd.to_numeric(df[wcol], errors="coerce")
 
-    df = df[df["Province (English)"].isin(CANADA_PROVINCES)]
-    return df, wcol
-
-df, WEIGHT_COL = load_data()
+    country_cols = [c for c in df.columns if "country" in c.lower() and "manufact" in c.lower()]
+    country_col = country_cols[0] if country_cols else None
+
+    df = df[df["Province (English)"].isin(CANADA_PROVINCES)].copy()
+    cat_cols = ["Province (English)", "Aircraft Category", "Type of Owner", "Engine Category",
+                "Manufacturer's Name", "Model Name"] + ([country_col] if country_col else [])
+    for c in cat_cols:
+        df[c] = df[c].astype("category")
+
+    # Lower-cased copies for the search box, so reruns don't re-lowercase.
+    # Arrow-backed strings make the substring scan run in libarrow, not Python.
+    df["Common Name"] = df["Common Name"].astype("string[pyarrow]")
+    df["_cn_lower"] = df["Common Name"].str.lower().fillna("")
+    df["_mn_lower"] = df["Model Name"].astype("string[pyarrow]").str.lower().fillna("")
+
+    # Sidebar choices don't depend on the filters, so build them once here.
+    # Categories only hold observed values, so this is O(ncategories).
+    option_cols = {"category": "Aircraft Category", "owner_type": "Type of Owner",
+                   "engine_cat": "Engine Category", "country": country_col}
+    options = {k: sorted(df[c].cat.categories.tolist()) if c else [] for k, c in option_cols.items()}
+
+    range_cols = {"engines": "Number of Engines", "year": "Year of Manufacture/Assembly",
+                  "age": "Aircraft Age", "weight": wcol}
+    ranges = {k: (int(df[c].min()), int(df[c].max())) for k, c in range_cols.items() if c}
+    return df, wcol, country_col, options, ranges
+
+DATA_SIG = source_sig()
+df, WEIGHT_COL, country_col, options, ranges = load_data(sig=DATA_SIG)
+
+# The one slice taken per rerun: columns identifying each aircraft in the
+# dataset view, followed by the columns the charts read.
+USED_COLS = [c for c in [
+    "Mark", "Registration", "Issue Date", "Modified Date", "Common Name",
+    "Manufacturer's Name", "Model Name", "Aircraft Category", "Type of Owner", "Owner Name",
+    "Province (English)", "Aircraft Age", "Reg Year",
+] if c in df.columns]
 
 # --------------------------------------------------
 # Sidebar Filters
 # --------------------------------------------------
 st.sidebar.header("Filters")
 
-province = st.sidebar.multiselect("Province", CANADA_PROVINCES)
-category = st.sidebar.multiselect("Aircraft Category", sorted(df["Aircraft Category"].dropna().unique()))
-owner_type = st.sidebar.multiselect("Owner Type", sorted(df["Type of Owner"].dropna().unique()))
-engine_cat = st.sidebar.multiselect("Engine Category", sorted(df["Engine Category"].dropna().unique()))
+# Widgets inside a form only trigger a rerun when "Apply" is pressed, so
+# adjusting several filters costs one rerun instead of one per widget.
+form = st.sidebar.form("filters")
+
+province = form.multiselect("Province", CANADA_PROVINCES)
+category = form.multiselect("Aircraft Category", options["category"])
+owner_type = form.multiselect("Owner Type", options["owner_type"])
+engine_cat = form.multiselect("Engine Category", options["engine_cat"])
 
-min_eng, max_eng = int(df["Number of Engines"].min()), int(df["Number of Engines"].max())
-col1, col2 = st.sidebar.columns(2)
+min_eng, max_eng = ranges["engines"]
+col1, col2 = form.columns(2)
 min_eng_input = col1.number_input("Min Engines", min_value=min_eng, max_value=max_eng, value=min_eng)
 max_eng_input = col2.number_input("Max Engines", min_value=min_eng, max_value=max_eng, value=max_eng)
 num_engines = (min_eng_input, max_eng_input)
 
-min_year, max_year = int(df["Year of Manufacture/Assembly"].min()), int(df["Year of Manufacture/Assembly"].max())
-col1, col2 = st.sidebar.columns(2)
+min_year, max_year = ranges["year"]
+col1, col2 = form.columns(2)
 min_year_input = col1.number_input("Min Year", min_value=min_year, max_value=max_year, value=min_year)
 max_year_input = col2.number_input("Max Year", min_value=min_year, max_value=max_year, value=max_year)
 year_range = (min_year_input, max_year_input)
 
-min_age, max_age = int(df["Aircraft Age"].min()), int(df["Aircraft Age"].max())
-col1, col2 = st.sidebar.columns(2)
+min_age, max_age = ranges["age"]
+col1, col2 = form.columns(2)
 min_age_input = col1.number_input("Min Age", min_value=min_age, max_value=max_age, value=min_age)
 max_age_input = col2.number_input("Max Age", min_value=min_age, max_value=max_age, value=max_age)
 age_range = (min_age_input, max_age_input)
 
 if WEIGHT_COL:
-    min_w, max_w = int(df[WEIGHT_COL].min()), int(df[WEIGHT_COL].max())
-    col1, col2 = st.sidebar.columns(2)
+    min_w, max_w = ranges["weight"]
+    col1, col2 = form.columns(2)
     min_w_input = col1.number_input("Min Weight", min_value=min_w, max_value=max_w, value=min_w)
     max_w_input = col2.number_input("Max Weight", min_value=min_w, max_value=max_w, value=max_w)
     weight_range = (min_w_input, max_w_input)
 else:
     weight_range = None
 
-country_cols = [c for c in df.columns if "country" in c.lower() and "manufact" in c.lower()]
-country_col = country_cols[0] if country_cols else None
 if country_col:
-    country_sel = st.sidebar.multiselect("Country of Manufacture", sorted(df[country_col].dropna().unique()))
+    country_sel = form.multiselect("Country of Manufacture", options["country"])
 else:
     country_sel = []
 
-search = st.sidebar.text_input("Search Common Name / Model")
+search = form.text_input("Search Common Name / Model")
+form.form_submit_button("Apply")
 
 # Chart visibility checkboxes
 st.sidebar.markdown("---")
@@ -113,123 +248,166 @@ st.sidebar.markdown("**Created by Victor Pham**  \n_Last updated June 2025_")
 # --------------------------------------------------
 # Filter Application
 # --------------------------------------------------
-flt = df.copy()
+# Every predicate is and-ed into one boolean array so the frame is sliced once.
+mask = np.ones(len(df), dtype=bool)
 if province:
-    flt = flt[flt["Province (English)"].isin(province)]
+    mask &= df["Province (English)"].isin(province).to_numpy()
 if category:
-    flt = flt[flt["Aircraft Category"].isin(category)]
+    mask &= df["Aircraft Category"].isin(category).to_numpy()
 if owner_type:
-    flt = flt[flt["Type of Owner"].isin(owner_type)]
+    mask &= df["Type of Owner"].isin(owner_type).to_numpy()
 if engine_cat:
-    flt = flt[flt["Engine Category"].isin(engine_cat)]
+    mask &= df["Engine Category"].isin(engine_cat).to_numpy()
 if country_sel and country_col:
-    flt = flt[flt[country_col].isin(country_sel)]
+    mask &= df[country_col].isin(country_sel).to_numpy()
 
-flt = flt[
-    flt["Number of Engines"].between(*num_engines) &
-    flt["Year of Manufacture/Assembly"].between(*year_range) &
-    flt["Aircraft Age"].between(*age_range)
-]
+mask &= in_range(df["Number of Engines"], *num_engines)
+mask &= in_range(df["Year of Manufacture/Assembly"], *year_range)
+mask &= in_range(df["Aircraft Age"], *age_range)
 if WEIGHT_COL and weight_range:
-    flt = flt[flt[WEIGHT_COL].between(*weight_range)]
+    mask &= in_range(df[WEIGHT_COL], *weight_range)
 
 if search:
-    mask = flt["Common Name"].str.contains(search, case=False, na=False) | flt["Model Name"].str.contains(search, case=False, na=False)
-    flt = flt[mask]
+    s = search.lower()
+    mask &= (
+        df["_cn_lower"].str.contains(s, regex=False).to_numpy(dtype=bool)
+        | df["_mn_lower"].str.contains(s, regex=False).to_numpy(dtype=bool)
+    )
 
-flt = flt.replace("null", pd.NA)
+flt = df.loc[mask, USED_COLS]
 total = len(flt)
 
+# --------------------------------------------------
+# Cached Aggregations
+# --------------------------------------------------
+# Keyed on a digest of the mask itself rather than hashing `flt`, so the key
+# always matches the rows selected (however the filters change) while reruns
+# that only toggle chart checkboxes reuse the previous results.
+filter_sig = (DATA_SIG, hashlib.blake2b(np.packbits(mask).tobytes(), digest_size=16).hexdigest())
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def count_values(sig, _flt, col, n=None, sort=True):
+    counts = _flt[col].value_counts(sort=sort)
+    counts = counts[counts > 0]  # categoricals report unused categories as 0
+    return counts.head(n) if n else counts
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def count_operators(sig, _flt, owner_col, n=10):
+    return _flt.loc[_flt["Type of Owner"] == "Entity", owner_col].value_counts().head(n)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def count_by_year(sig, _flt):
+    # Owner NaNs are kept so the per-year totals derived from this stay complete.
+    counts = _flt.groupby(["Reg Year", "Type of Owner"], observed=True, sort=False, dropna=False).size()
+    # Sorting the few aggregated rows keeps the line charts in year order.
+    return counts.reset_index(name="Count").dropna(subset=["Reg Year"]).sort_values("Reg Year")
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def bin_values(sig, _flt, col, bins=30):
+    values = _flt[col].dropna().to_numpy(dtype="float64")
+    lo, hi = (int(values.min()), int(values.max())) if values.size else (0, 0)
+    # Whole-number bin widths so each bar covers the same number of integer values.
+    width = max(1, -(-(hi - lo + 1) // bins))
+    counts, edges = np.histogram(values, bins=np.arange(lo, hi + width + 1, width))
+    return counts, edges
+
 # --------------------------------------------------
 # Styling Helpers
 # --------------------------------------------------
 bar_lbl = dict(texttemplate="%{y}", textposition="outside")
 axis_fmt = dict(title_font=dict(size=14, family="Arial"))
+pie_fmt = dict(hole=.45, hovertemplate="%{label}: %{value} (%{percent})")
+line_fmt = dict(mode="lines+markers")  # Scattergl draws through WebGL
 
 # --------------------------------------------------
 # Charts
 # --------------------------------------------------
 st.title("🌎 Canadian Aircraft Registry Dashboard")
 
-if chart_top_manu and not flt.empty:
+has_data = not flt.empty
+if has_data and any((chart_top_manu, chart_top_model, chart_top_operator, chart_cat_dist, chart_owner_type,
+                     chart_age_hist, chart_prov_bar, chart_reg_year, chart_owner_trend)):
+    go = plotly_go()
+
+if chart_top_manu and has_data:
     st.subheader("Top 10 Aircraft Manufacturers")
-    manu_df = flt["Manufacturer's Name"].value_counts().head(10).reset_index()
+    manu_df = count_values(filter_sig, flt, "Manufacturer's Name", 10).reset_index()
     manu_df.columns = ["Manufacturer", "Count"]
-    fig_manu = px.bar(manu_df, x="Manufacturer", y="Count", title="Top 10 Manufacturers")
-    fig_manu.update_traces(**bar_lbl)
-    fig_manu.update_layout(xaxis_title="Manufacturer", yaxis_title="Count", **axis_fmt)
+    fig_manu = go.Figure(go.Bar(x=manu_df["Manufacturer"], y=manu_df["Count"], **bar_lbl))
+    fig_manu.update_layout(title="Top 10 Manufacturers", xaxis_title="Manufacturer", yaxis_title="Count", **axis_fmt)
     st.plotly_chart(fig_manu, use_container_width=True)
 
-if chart_top_model and not flt.empty:
+if chart_top_model and has_data:
     st.subheader("Top 10 Aircraft Models")
-    model_df = flt["Model Name"].value_counts().head(10).reset_index()
+    model_df = count_values(filter_sig, flt, "Model Name", 10).reset_index()
     model_df.columns = ["Model", "Count"]
-    fig_model = px.bar(model_df, x="Model", y="Count", title="Top 10 Models")
-    fig_model.update_traces(**bar_lbl)
-    fig_model.update_layout(xaxis_title="Model", yaxis_title="Count", **axis_fmt)
+    fig_model = go.Figure(go.Bar(x=model_df["Model"], y=model_df["Count"], **bar_lbl))
+    fig_model.update_layout(title="Top 10 Models", xaxis_title="Model", yaxis_title="Count", **axis_fmt)
     st.plotly_chart(fig_model, use_container_width=True)
 
-if "Owner Name" in flt.columns or "Owner Name" in flt.columns:
+if chart_top_operator and has_data and "Owner Name" in flt.columns:
     st.subheader("Top 10 Commercial Operators (Entities)")
-    owner_label = "Owner Name" if "Owner Name" in flt.columns else "Owner Name"
-    op_df = (
-        flt[flt["Type of Owner"] == "Entity"]
-        .dropna(subset=[owner_label])
-        [owner_label]
-        .value_counts()
-        .head(10)
-        .reset_index()
-    )
+    op_df = count_operators(filter_sig, flt, "Owner Name").reset_index()
     op_df.columns = ["Operator", "Count"]
     if not op_df.empty:
-        fig_op = px.bar(op_df, x="Operator", y="Count", title="Top 10 Airlines / Operators")
-        fig_op.update_traces(**bar_lbl)
-        fig_op.update_layout(xaxis_title="Operator", yaxis_title="Count", **axis_fmt)
+        fig_op = go.Figure(go.Bar(x=op_df["Operator"], y=op_df["Count"], **bar_lbl))
+        fig_op.update_layout(title="Top 10 Airlines / Operators", xaxis_title="Operator", yaxis_title="Count", **axis_fmt)
         st.plotly_chart(fig_op, use_container_width=True)
 
-if chart_cat_dist and not flt.empty:
+if chart_cat_dist and has_data:
     st.subheader("Aircraft Category Distribution")
-    fig_cat = px.pie(flt, names="Aircraft Category", title="Aircraft Category Share", hole=.45)
-    fig_cat.update_traces(hovertemplate="%{label}: %{value} (%{percent})")
+    cat_counts = count_values(filter_sig, flt, "Aircraft Category", sort=False)
+    fig_cat = go.Figure(go.Pie(labels=cat_counts.index, values=cat_counts.to_numpy(), **pie_fmt))
+    fig_cat.update_layout(title="Aircraft Category Share")
     fig_cat.add_annotation(text=f"{total}", x=0.5, y=0.5, font_size=18, showarrow=False)
     st.plotly_chart(fig_cat, use_container_width=True)
 
-if chart_owner_type and not flt.empty:
+if chart_owner_type and has_data:
     st.subheader("Ownership Type Share")
-    fig_owner = px.pie(flt, names="Type of Owner", title="Entity vs Individual", hole=.45)
-    fig_owner.update_traces(hovertemplate="%{label}: %{value} (%{percent})")
+    owner_counts = count_values(filter_sig, flt, "Type of Owner", sort=False)
+    fig_owner = go.Figure(go.Pie(labels=owner_counts.index, values=owner_counts.to_numpy(), **pie_fmt))
+    fig_owner.update_layout(title="Entity vs Individual")
     fig_owner.add_annotation(text=f"{total}", x=0.5, y=0.5, font_size=18, showarrow=False)
     st.plotly_chart(fig_owner, use_container_width=True)
 
-if chart_age_hist and not flt.empty:
+if chart_age_hist and has_data:
     st.subheader("Aircraft Age Distribution")
-    fig_age = px.histogram(flt.dropna(subset=["Aircraft Age"]), x="Aircraft Age", nbins=30, title="Aircraft Age Histogram")
-    fig_age.update_layout(xaxis_title="Aircraft Age", yaxis_title="Count", **axis_fmt)
+    # Bin server-side so only 30 counts are sent to the browser, not every row.
+    counts, edges = bin_values(filter_sig, flt, "Aircraft Age")
+    fig_age = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+    fig_age.update_layout(title="Aircraft Age Histogram", bargap=0, xaxis_title="Aircraft Age", yaxis_title="Count", **axis_fmt)
     st.plotly_chart(fig_age, use_container_width=True)
 
-if chart_prov_bar and not flt.empty:
+if chart_prov_bar and has_data:
     st.subheader("Aircraft Count by Province")
-    prov_df = flt["Province (English)"].value_counts().reset_index()
+    prov_df = count_values(filter_sig, flt, "Province (English)").reset_index()
     prov_df.columns = ["Province", "Count"]
-    fig_prov = px.bar(prov_df, x="Province", y="Count", title="Aircraft Count by Province")
-    fig_prov.update_traces(**bar_lbl)
-    fig_prov.update_layout(xaxis_title="Province", yaxis_title="Count", **axis_fmt)
+    fig_prov = go.Figure(go.Bar(x=prov_df["Province"], y=prov_df["Count"], **bar_lbl))
+    fig_prov.update_layout(title="Aircraft Count by Province", xaxis_title="Province", yaxis_title="Count", **axis_fmt)
     st.plotly_chart(fig_prov, use_container_width=True)
 
-if chart_reg_year:
+# Both yearly charts come from one groupby over (Reg Year, Type of Owner).
+if (chart_reg_year or chart_owner_trend) and has_data:
+    year_owner_df = count_by_year(filter_sig, flt)
+
+if chart_reg_year and has_data:
     st.subheader("Registrations per Year")
-    reg_df = flt.dropna(subset=["Reg Year"]).groupby("Reg Year").size().reset_index(name="Count")
+    reg_df = year_owner_df.groupby("Reg Year", as_index=False, sort=False)["Count"].sum()
     if not reg_df.empty:
-        fig_reg = px.line(reg_df, x="Reg Year", y="Count", markers=True, title="New Registrations by Year")
-        fig_reg.update_layout(xaxis_title="Year", yaxis_title="Count", **axis_fmt)
+        fig_reg = go.Figure(go.Scattergl(x=reg_df["Reg Year"], y=reg_df["Count"], **line_fmt))
+        fig_reg.update_layout(title="New Registrations by Year", xaxis_title="Year", yaxis_title="Count", **axis_fmt)
         st.plotly_chart(fig_reg, use_container_width=True)
 
-if chart_owner_trend:
+if chart_owner_trend and has_data:
     st.subheader("Ownership Trend Over Time")
-    trend_df = flt.dropna(subset=["Reg Year"]).groupby(["Reg Year", "Type of Owner"]).size().reset_index(name="Count")
+    trend_df = year_owner_df.dropna(subset=["Type of Owner"])
     if not trend_df.empty:
-        fig_trend = px.line(trend_df, x="Reg Year", y="Count", color="Type of Owner", markers=True, title="Entity vs Individual Over Time")
-        fig_trend.update_layout(xaxis_title="Year", yaxis_title="Count", **axis_fmt)
+        fig_trend = go.Figure([
+            go.Scattergl(x=grp["Reg Year"], y=grp["Count"], name=str(owner), **line_fmt)
+            for owner, grp in trend_df.groupby("Type of Owner", observed=True, sort=False)
+        ])
+        fig_trend.update_layout(title="Entity vs Individual Over Time", xaxis_title="Year", yaxis_title="Count",
+                                legend_title_text="Type of Owner", **axis_fmt)
         st.plotly_chart(fig_trend, use_container_width=True)
 
 # --------------------------------------------------